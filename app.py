@@ -6,51 +6,139 @@ This application demonstrates how to use vectorless RAG for precise
 information extraction from structured documents without vector embeddings.
 """
 
-import json
+import argparse
+import asyncio
+import hashlib
 import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple
+from typing import Callable, Tuple
 
+import orjson
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import (
+    DEFAULT_CONNECTION_LIMITS,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient,
+    OpenAI,
+    Timeout,
+)
 from rich.console import Console
+from rich.live import Live
 from rich.panel import Panel
 from rich.markdown import Markdown
+from rich.spinner import Spinner
 from rich.table import Table
+from rich.text import Text
 from rich.tree import Tree
 
-from pageindex import DocumentIndex, PageIndexNavigator, QueryResult
+from pageindex import (
+    INDEX_FORMAT_VERSION,
+    CompactTree,
+    DocumentIndex,
+    PageIndexNavigator,
+    QueryResult,
+)
 
 # Load environment variables
 load_dotenv()
 
 console = Console()
 
+SAMPLE_DATA_DIR = Path(__file__).parent / "sample_data"
+SEC_SAMPLE_PATH = SAMPLE_DATA_DIR / "sec_10k_sample.json"
+SOP_SAMPLE_PATH = SAMPLE_DATA_DIR / "assortment_planning_guide.json"
 
-def load_sec_filing() -> DocumentIndex:
-    """Load the sample SEC 10-K filing."""
-    sample_path = Path(__file__).parent / "sample_data" / "sec_10k_sample.json"
+# Navigation makes many short sequential calls, so keep connections alive
+# and multiplex over HTTP/2 instead of paying TCP+TLS setup per request
+# Built from the SDK's own HTTP config types so they match its HTTP client
+HTTP_TIMEOUT = Timeout(120.0, connect=10.0)
+HTTP_LIMITS = type(DEFAULT_CONNECTION_LIMITS)(max_keepalive_connections=32, max_connections=64)
+
+
+def _load_index(sample_path: Path, build: Callable[[dict], DocumentIndex]) -> DocumentIndex:
+    """
+    Load a document index from JSON, reusing a pickled copy of the built tree.
     
+    The pickle sidecar is keyed by a hash of the source file (and the index
+    format version), so editing the JSON transparently triggers a rebuild.
+    Section content lives in a ``.content`` sidecar next to it and is read
+    lazily, so only the tree structure and previews are held in memory.
+    """
     if not sample_path.exists():
         raise FileNotFoundError(f"Sample file not found: {sample_path}")
     
-    with open(sample_path) as f:
-        data = json.load(f)
+    raw = sample_path.read_bytes()
+    digest = hashlib.blake2b(raw, digest_size=8)
+    digest.update(str(INDEX_FORMAT_VERSION).encode())
+    cache_path = sample_path.with_suffix(f".{digest.hexdigest()}.pkl")
+    content_path = cache_path.with_suffix(".content")
     
-    return DocumentIndex.from_sec_filing(data)
+    if cache_path.exists() and content_path.exists():
+        try:
+            index = pickle.loads(cache_path.read_bytes())
+        except Exception:
+            # Unreadable or outdated sidecar - fall through and rebuild it
+            pass
+        else:
+            # The pickled path is absolute; follow the checkout if it moved
+            if index.content_store is not None:
+                index.content_store.path = content_path
+            return index
+    
+    index = build(orjson.loads(raw))
+    
+    try:
+        for pattern in (f"{sample_path.stem}.*.pkl", f"{sample_path.stem}.*.content"):
+            for stale in sample_path.parent.glob(pattern):
+                stale.unlink()
+        index.offload_content(content_path)
+        cache_path.write_bytes(pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL))
+    except OSError:
+        pass
+    return index
+
+
+def load_sec_filing() -> DocumentIndex:
+    """Load the sample SEC 10-K filing."""
+    return _load_index(SEC_SAMPLE_PATH, DocumentIndex.from_sec_filing)
 
 
 def load_supply_chain_sop() -> DocumentIndex:
     """Load the sample Supply Chain / Assortment Planning SOP."""
-    sample_path = Path(__file__).parent / "sample_data" / "assortment_planning_guide.json"
-    
-    if not sample_path.exists():
-        raise FileNotFoundError(f"Sample file not found: {sample_path}")
-    
-    with open(sample_path) as f:
-        data = json.load(f)
-    
-    return DocumentIndex.from_supply_chain_sop(data)
+    return _load_index(SOP_SAMPLE_PATH, DocumentIndex.from_supply_chain_sop)
+
+
+def create_client(api_key: str) -> OpenAI:
+    """Create an OpenAI client backed by a pooled HTTP/2 connection."""
+    # The SDK's default client class keeps its other defaults (e.g. redirects)
+    http_client = DefaultHttpxClient(http2=True, timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+    return OpenAI(api_key=api_key, http_client=http_client)
+
+
+def create_async_client(api_key: str) -> AsyncOpenAI:
+    """Create an AsyncOpenAI client backed by a pooled HTTP/2 connection."""
+    http_client = DefaultAsyncHttpxClient(http2=True, timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+    return AsyncOpenAI(api_key=api_key, http_client=http_client)
+
+
+def prefetch_sample_files():
+    """Ask the OS to start reading the sample files into the page cache."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for path in (SEC_SAMPLE_PATH, SOP_SAMPLE_PATH):
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
 
 
 def display_document_structure(index: DocumentIndex, max_depth: int = 3):
@@ -63,21 +151,30 @@ def display_document_structure(index: DocumentIndex, max_depth: int = 3):
         title = f"[SOP] {index.metadata.get('title', index.document_id)}"
     
     tree = Tree(title)
+    compact = index.compact or CompactTree.from_root(index.root)
     
-    def add_children(parent_tree, node, depth=0):
+    stack = [(tree, 0, 0)]
+    while stack:
+        parent_tree, i, depth = stack.pop()
         if depth >= max_depth:
-            if node.children:
+            if compact.children[i]:
                 parent_tree.add("[dim]...[/dim]")
-            return
-        for child_id, child in node.children.items():
-            icon = "[+]" if child.children else "[-]"
-            child_tree = parent_tree.add(f"{icon} {child_id}: {child.title}")
-            add_children(child_tree, child, depth + 1)
+            continue
+        for child in compact.children[i]:
+            icon = "[+]" if compact.children[child] else "[-]"
+            child_tree = parent_tree.add(f"{icon} {compact.ids[child]}: {compact.titles[child]}")
+            stack.append((child_tree, child, depth + 1))
     
-    add_children(tree, index.root)
     console.print(tree)
 
 
+def _make_sources_table() -> Table:
+    """Create an empty sources table with its column layout."""
+    table = Table(title="Sources")
+    table.add_column("Section", style="cyan")
+    return table
+
+
 def display_result(result: QueryResult, show_trace: bool = True):
     """Display query results in a formatted way."""
     # Answer panel
@@ -89,19 +186,20 @@ def display_result(result: QueryResult, show_trace: bool = True):
     
     # Sources table
     if result.sources:
-        table = Table(title="Sources")
-        table.add_column("Section", style="cyan")
+        table = _make_sources_table()
         for source in result.sources:
-            table.add_row(source)
+            table.add_row(Text(source))
         console.print(table)
     
     # Navigation path
-    console.print(f"\n[dim]Navigation Path: {' → '.join(result.navigation_path)}[/dim]")
+    # Plain Text: section IDs and LLM reasoning skip markup parsing and highlighting
+    console.print()
+    console.print(Text(f"Navigation Path: {' → '.join(result.navigation_path)}", style="dim"))
     
     # Navigation trace (optionally shown)
     if show_trace:
         console.print(Panel(
-            "\n".join(result.reasoning_trace),
+            Text("\n".join(result.reasoning_trace)),
             title="Navigation Trace",
             border_style="dim"
         ))
@@ -111,6 +209,23 @@ def display_result(result: QueryResult, show_trace: bool = True):
     console.print(f"\n[{confidence_color}]Confidence: {result.confidence:.0%}[/{confidence_color}]")
 
 
+def stream_query(navigator: PageIndexNavigator, index: DocumentIndex, query: str,
+                 status: str) -> QueryResult:
+    """Run a query, showing a spinner and then the answer as it streams in."""
+    answer_parts = []
+    
+    with Live(Spinner("dots", text=status), console=console, transient=True) as live:
+        def on_token(token: str):
+            answer_parts.append(token)
+            live.update(Panel(
+                Markdown("".join(answer_parts)),
+                title="Answer",
+                border_style="green"
+            ))
+        
+        return navigator.query(index, query, on_token=on_token)
+
+
 def interactive_mode(navigator: PageIndexNavigator, index: DocumentIndex):
     """Run in interactive query mode."""
     doc_type = index.metadata.get('document_type', 'document')
@@ -128,14 +243,13 @@ def interactive_mode(navigator: PageIndexNavigator, index: DocumentIndex):
         
         console.print("\n[dim]Navigating document structure...[/dim]\n")
         
-        with console.status("[bold blue]Analyzing document..."):
-            result = navigator.query(index, query)
+        result = stream_query(navigator, index, query, "[bold blue]Analyzing document...")
         
         display_result(result)
         console.print("\n" + "="*60 + "\n")
 
 
-def run_sec_demo(navigator: PageIndexNavigator, index: DocumentIndex):
+def run_sec_demo(navigator: PageIndexNavigator, index: DocumentIndex, batch: bool = False):
     """Run SEC 10-K filing demonstration queries."""
     demo_queries = [
         "What is ACME Corporation's total revenue for FY2025 and how did it grow compared to previous year?",
@@ -155,10 +269,11 @@ def run_sec_demo(navigator: PageIndexNavigator, index: DocumentIndex):
     display_document_structure(index)
     console.print("\n")
     
-    _run_queries(navigator, index, demo_queries)
+    _run_queries(navigator, index, demo_queries, batch=batch)
 
 
-def run_supply_chain_demo(navigator: PageIndexNavigator, index: DocumentIndex):
+def run_supply_chain_demo(navigator: PageIndexNavigator, index: DocumentIndex,
+                          batch: bool = False):
     """Run Supply Chain / Assortment Planning demonstration queries."""
     demo_queries = [
         "What is the markdown policy for dairy products?",
@@ -182,16 +297,20 @@ def run_supply_chain_demo(navigator: PageIndexNavigator, index: DocumentIndex):
     display_document_structure(index)
     console.print("\n")
     
-    _run_queries(navigator, index, demo_queries)
+    _run_queries(navigator, index, demo_queries, batch=batch)
 
 
-def _run_queries(navigator: PageIndexNavigator, index: DocumentIndex, queries: list):
+def _run_queries(navigator: PageIndexNavigator, index: DocumentIndex, queries: list,
+                 batch: bool = False):
     """Execute a list of demo queries."""
+    if batch:
+        _run_queries_batch(navigator, index, queries)
+        return
+    
     for i, query in enumerate(queries, 1):
         console.print(Panel(query, title=f"Query {i}", border_style="yellow"))
         
-        with console.status("[bold blue]Navigating document tree..."):
-            result = navigator.query(index, query)
+        result = stream_query(navigator, index, query, "[bold blue]Navigating document tree...")
         
         display_result(result)
         console.print("\n" + "="*80 + "\n")
@@ -201,8 +320,37 @@ def _run_queries(navigator: PageIndexNavigator, index: DocumentIndex, queries: l
             console.input("[dim]Press Enter for next query...[/dim]")
 
 
+def _run_queries_batch(navigator: PageIndexNavigator, index: DocumentIndex, queries: list):
+    """Execute demo queries concurrently and display results in query order."""
+    with console.status(f"[bold blue]Navigating document tree for {len(queries)} queries..."):
+        results = asyncio.run(navigator.aquery_many(index, queries))
+    
+    for i, (query, result) in enumerate(zip(queries, results), 1):
+        console.print(Panel(query, title=f"Query {i}", border_style="yellow"))
+        display_result(result)
+        console.print("\n" + "="*80 + "\n")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Vectorless RAG demo")
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="run demo queries concurrently without pausing between them"
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="plan all target sections up front and extract them in parallel"
+    )
+    return parser.parse_args()
+
+
 def main():
     """Main entry point."""
+    args = parse_args()
+    
     # Check for API key
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
@@ -210,45 +358,66 @@ def main():
         console.print("Please set it in your .env file or environment.")
         return
     
-    # Initialize components
+    # Initialize components in the background while the user picks options
     console.print("[dim]Initializing PageIndex...[/dim]")
-    client = OpenAI(api_key=api_key)
-    navigator = PageIndexNavigator(client)
+    prefetch_sample_files()
     
-    # Document type selection
-    console.print("\n[bold]Select Document Type:[/bold]")
-    console.print("1. Supply Chain SOP (Assortment Planning)")
-    console.print("2. SEC 10-K Filing (Financial Report)")
-    
-    doc_choice = console.input("\nDocument (1/2) [default: 1]: ").strip() or "1"
-    
-    try:
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        client_future = pool.submit(create_client, api_key)
+        
+        # Document type selection
+        console.print("\n[bold]Select Document Type:[/bold]")
+        console.print("1. Supply Chain SOP (Assortment Planning)")
+        console.print("2. SEC 10-K Filing (Financial Report)")
+        
+        doc_choice = console.input("\nDocument (1/2) [default: 1]: ").strip() or "1"
+        
         if doc_choice == "2":
             console.print("[dim]Loading SEC 10-K filing...[/dim]")
-            index = load_sec_filing()
-            console.print(f"[green]Loaded {index.metadata['company']} {index.metadata['filing_type']}[/green]\n")
+            index_future = pool.submit(load_sec_filing)
         else:
             console.print("[dim]Loading Supply Chain SOP...[/dim]")
-            index = load_supply_chain_sop()
+            index_future = pool.submit(load_supply_chain_sop)
+        
+        # Mode selection
+        console.print("\n[bold]Select Mode:[/bold]")
+        console.print("1. Run demo queries")
+        console.print("2. Interactive mode")
+        
+        mode_choice = console.input("\nMode (1/2) [default: 1]: ").strip() or "1"
+        
+        # Only batched demo queries use the async client
+        async_client_future = None
+        if args.batch and mode_choice != "2":
+            async_client_future = pool.submit(create_async_client, api_key)
+        
+        try:
+            index = index_future.result()
+        except FileNotFoundError as e:
+            console.print(f"[red]Error: {e}[/red]")
+            return
+        
+        if doc_choice == "2":
+            console.print(f"[green]Loaded {index.metadata['company']} {index.metadata['filing_type']}[/green]\n")
+        else:
             console.print(f"[green]Loaded {index.metadata['title']}[/green]\n")
-    except FileNotFoundError as e:
-        console.print(f"[red]Error: {e}[/red]")
-        return
-    
-    # Mode selection
-    console.print("[bold]Select Mode:[/bold]")
-    console.print("1. Run demo queries")
-    console.print("2. Interactive mode")
+        
+        client = client_future.result()
+        async_client = async_client_future.result() if async_client_future else None
     
-    mode_choice = console.input("\nMode (1/2) [default: 1]: ").strip() or "1"
+    navigator = PageIndexNavigator(
+        client,
+        async_client=async_client,
+        speculative_descent=args.plan
+    )
     
     if mode_choice == "2":
         interactive_mode(navigator, index)
     else:
         if doc_choice == "2":
-            run_sec_demo(navigator, index)
+            run_sec_demo(navigator, index, batch=args.batch)
         else:
-            run_supply_chain_demo(navigator, index)
+            run_supply_chain_demo(navigator, index, batch=args.batch)
     
     console.print("\n[bold green]Thank you for trying Vectorless RAG![/bold green]")
 
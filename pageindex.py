@@ -6,13 +6,36 @@ This module implements the core PageIndex algorithm that replaces traditional
 vector databases with LLM-driven reasoning for precise information retrieval.
 """
 
-import json
+import array
+import asyncio
+import contextlib
+import hashlib
+import heapq
+import io
+import math
+import mmap
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Optional
+from pathlib import Path
+from typing import Callable, Optional, TypeVar
 from enum import Enum
 
-from openai import OpenAI
-from pydantic import BaseModel
+import orjson
+from openai import AsyncOpenAI, OpenAI
+from pydantic import BaseModel, TypeAdapter, ValidationError, ValidationInfo, field_validator
+
+
+T = TypeVar("T")
+
+# Bump whenever DocumentIndex/DocumentNode change shape, so that pickled
+# indexes from older versions are rebuilt instead of loaded
+INDEX_FORMAT_VERSION = 8
 
 
 class NavigationAction(str, Enum):
@@ -25,11 +48,52 @@ class NavigationAction(str, Enum):
 
 class NavigationDecision(BaseModel):
     """LLM's decision on how to navigate the document tree."""
-    action: NavigationAction
+    # Defaults tolerate fields the model leaves out of its JSON response
+    action: NavigationAction = NavigationAction.COMPLETE
     target_section: Optional[str] = None
-    reasoning: str
+    reasoning: str = ""
     extracted_info: Optional[str] = None
-    confidence: float = 0.0
+    confidence: float = 0.5
+    
+    @field_validator("target_section")
+    @classmethod
+    def _intern_target(cls, value: Optional[str]) -> Optional[str]:
+        """Intern the ID so the children lookup matches the interned key by identity."""
+        return _intern(value)
+    
+    @field_validator("action", "reasoning", "confidence", mode="before")
+    @classmethod
+    def _null_as_default(cls, value, info: ValidationInfo):
+        """Treat an explicit JSON null like a missing field."""
+        return cls.model_fields[info.field_name].default if value is None else value
+
+
+class _TargetPlan(BaseModel):
+    """Planner response: the section IDs to extract from."""
+    targets: list[str] = []
+    
+    @field_validator("targets")
+    @classmethod
+    def _intern_targets(cls, value: list[str]) -> list[str]:
+        return [_intern(target) for target in value]
+
+
+class _SectionExtraction(BaseModel):
+    """Extraction response for a single planned section."""
+    extracted_info: str = ""
+    confidence: float = 0.5
+    
+    @field_validator("extracted_info", "confidence", mode="before")
+    @classmethod
+    def _null_as_default(cls, value, info: ValidationInfo):
+        """Treat an explicit JSON null like a missing field."""
+        return cls.model_fields[info.field_name].default if value is None else value
+
+
+# Compiled once; validate raw JSON responses without an intermediate dict
+_NAV_DECISION_ADAPTER = TypeAdapter(NavigationDecision)
+_TARGET_PLAN_ADAPTER = TypeAdapter(_TargetPlan)
+_SECTION_EXTRACTION_ADAPTER = TypeAdapter(_SectionExtraction)
 
 
 class QueryResult(BaseModel):
@@ -41,34 +105,417 @@ class QueryResult(BaseModel):
     reasoning_trace: list[str]
 
 
+@dataclass
+class _CacheEntry:
+    document_id: str
+    expires_at: float
+    embedding: Optional[list[float]]
+    payload: str
+
+
+@dataclass
+class SemanticCache:
+    """
+    LRU cache of final QueryResults keyed by document and normalized query.
+
+    Exact repeats are served from a hash lookup. When an ``embed`` function is
+    supplied, paraphrased queries whose embedding cosine similarity exceeds
+    ``similarity_threshold`` are served from the closest cached entry.
+    ``aget()``/``aput()`` run that (blocking) embed call in a worker thread;
+    the cache itself is only ever touched from the calling thread.
+    """
+    max_entries: int = 256
+    ttl_seconds: float = 3600.0
+    similarity_threshold: float = 0.92
+    embed: Optional[Callable[[str], list[float]]] = None
+    stats: dict[str, int] = field(default_factory=lambda: {"hits": 0, "misses": 0})
+    _entries: OrderedDict[str, _CacheEntry] = field(default_factory=OrderedDict, init=False, repr=False)
+    # Query embeddings computed on a miss, reused by put() for the same key
+    _pending_embeddings: OrderedDict[str, list[float]] = field(default_factory=OrderedDict, init=False, repr=False)
+
+    MAX_PENDING_EMBEDDINGS = 64
+
+    @staticmethod
+    def make_key(document_id: str, query: str) -> str:
+        """Hash the document ID and normalized query into a cache key."""
+        normalized = " ".join(query.strip().lower().split())
+        payload = orjson.dumps([document_id, normalized], option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, document_id: str, query: str) -> Optional[QueryResult]:
+        """Return a cached result for the query, or None on a miss."""
+        key = self.make_key(document_id, query)
+        embedding = None
+        if self._needs_embedding(key, document_id):
+            embedding = self._remember_embedding(key, self.embed(query))
+        return self._lookup(key, document_id, embedding)
+
+    async def aget(self, document_id: str, query: str) -> Optional[QueryResult]:
+        """Async variant of get() that doesn't block the event loop on embedding."""
+        key = self.make_key(document_id, query)
+        embedding = None
+        if self._needs_embedding(key, document_id):
+            embedding = self._remember_embedding(key, await asyncio.to_thread(self.embed, query))
+        return self._lookup(key, document_id, embedding)
+
+    def put(self, document_id: str, query: str, result: QueryResult):
+        """Store a result, evicting the least recently used entry when full."""
+        key = self.make_key(document_id, query)
+        embedding = None
+        if self.embed is not None:
+            embedding = self._pending_embeddings.pop(key, None)
+            if embedding is None:
+                embedding = self._normalize(self.embed(query))
+        self._store(key, document_id, result, embedding)
+
+    async def aput(self, document_id: str, query: str, result: QueryResult):
+        """Async variant of put() that doesn't block the event loop on embedding."""
+        key = self.make_key(document_id, query)
+        embedding = None
+        if self.embed is not None:
+            embedding = self._pending_embeddings.pop(key, None)
+            if embedding is None:
+                embedding = self._normalize(await asyncio.to_thread(self.embed, query))
+        self._store(key, document_id, result, embedding)
+
+    def clear(self):
+        """Drop all cached entries and reset statistics."""
+        self._entries.clear()
+        self._pending_embeddings.clear()
+        self.stats["hits"] = self.stats["misses"] = 0
+
+    def _needs_embedding(self, key: str, document_id: str) -> bool:
+        """Whether a lookup must embed the query: no exact hit, but paraphrases to compare."""
+        self._evict_expired()
+        return (self.embed is not None and key not in self._entries
+                and any(e.document_id == document_id and e.embedding is not None
+                        for e in self._entries.values()))
+
+    def _remember_embedding(self, key: str, vector: list[float]) -> list[float]:
+        # Embed once per miss; put() reuses the vector for the same query
+        embedding = self._normalize(vector)
+        self._pending_embeddings[key] = embedding
+        while len(self._pending_embeddings) > self.MAX_PENDING_EMBEDDINGS:
+            self._pending_embeddings.popitem(last=False)
+        return embedding
+
+    def _lookup(self, key: str, document_id: str,
+                embedding: Optional[list[float]]) -> Optional[QueryResult]:
+        """Resolve a key (or, given an embedding, its nearest paraphrase) to a result."""
+        if key not in self._entries and embedding is not None:
+            key = self._nearest_key(key, document_id, embedding)
+        
+        if key not in self._entries:
+            self.stats["misses"] += 1
+            return None
+        
+        self.stats["hits"] += 1
+        self._entries.move_to_end(key)
+        return QueryResult.model_validate_json(self._entries[key].payload)
+
+    def _store(self, key: str, document_id: str, result: QueryResult,
+               embedding: Optional[list[float]]):
+        self._entries[key] = _CacheEntry(
+            document_id=document_id,
+            expires_at=time.monotonic() + self.ttl_seconds,
+            embedding=embedding,
+            payload=result.model_dump_json()
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _nearest_key(self, key: str, document_id: str, embedding: list[float]) -> str:
+        """Return the key of the most similar cached query, or ``key`` if none is close."""
+        candidates = [(k, e.embedding) for k, e in self._entries.items()
+                      if e.document_id == document_id and e.embedding is not None]
+        best_key, best_score = key, self.similarity_threshold
+        for candidate_key, candidate in candidates:
+            score = sum(a * b for a, b in zip(embedding, candidate))
+            if score > best_score:
+                best_key, best_score = candidate_key, score
+        return best_key
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+
+    @staticmethod
+    def _normalize(vector: list[float]) -> list[float]:
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+)*")
+
+# Question words and fillers that carry no signal when matching titles
+_STOPWORDS = frozenset("""
+a an and any are as at be by can do does for from how i in is it of on or
+our should the their there this to us we what when where which who why will
+with
+""".split())
+
+
+def _tokenize(text: str) -> list[str]:
+    """Lowercase word tokens with stopwords removed and plurals folded."""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 4 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _intern(value: T) -> T:
+    """Intern strings; pass anything else (e.g. a null title) through unchanged."""
+    return sys.intern(value) if type(value) is str else value
+
+
+class ContentStore:
+    """
+    Section content kept in a UTF-8 file and memory-mapped on first access.
+    
+    Nodes hold ``(offset, length)`` byte ranges into the file instead of the
+    text itself, so only the sections that are actually read get paged in.
+    Pickles as just its path.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._mmap: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+    
+    def read(self, offset: int, length: int) -> str:
+        """Decode the text stored at a byte range."""
+        if self._mmap is None:
+            with self._lock:
+                if self._mmap is None:
+                    with open(self.path, "rb") as f:
+                        self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap[offset:offset + length].decode("utf-8")
+    
+    def __getstate__(self) -> dict:
+        return {"path": self.path}
+    
+    def __setstate__(self, state: dict):
+        self.__init__(state["path"])
+
+
+class _NodeContent:
+    """
+    Data descriptor behind ``DocumentNode.content``.
+    
+    Text is held inline until DocumentIndex.offload_content() swaps it for a
+    ``(store, offset, length)`` range, which is read from the ContentStore on
+    access. Setting inline text also refreshes the node's resident preview.
+    """
+    
+    def __get__(self, node: Optional['DocumentNode'], owner: type = None) -> str:
+        if node is None:
+            # Class access; raising tells @dataclass the field has no default
+            raise AttributeError("content")
+        ref = node._content_ref
+        if ref is not None:
+            store, offset, length = ref
+            return store.read(offset, length)
+        return node._content
+    
+    def __set__(self, node: 'DocumentNode', value: str):
+        node._content = value
+        node._content_ref = None
+        node._content_length = len(value)
+        node._preview = value[:DocumentNode.PREVIEW_CHARS]
+
+
 @dataclass
 class DocumentNode:
     """Represents a node in the document tree structure."""
     id: str
     title: str
-    content: str
+    content: str = _NodeContent()
     level: int
     parent: Optional['DocumentNode'] = None
     children: dict[str, 'DocumentNode'] = field(default_factory=dict)
+    _sections_cache: dict[int, str] = field(default_factory=dict, init=False, repr=False, compare=False)
+    title_tokens: frozenset[str] = field(default=frozenset(), init=False, repr=False, compare=False)
+    
+    # Leading characters kept in memory; previews up to this width never
+    # read offloaded content (sections this short stay fully resident)
+    PREVIEW_CHARS = 800
+    
+    def __post_init__(self):
+        self.title_tokens = frozenset(_tokenize(f"{self.title} {self.id}"))
+    
+    def __setstate__(self, state: dict):
+        # Unpickled strings are not interned; restore it for IDs and child keys
+        state['id'] = _intern(state['id'])
+        state['title'] = _intern(state['title'])
+        state['children'] = {_intern(key): child for key, child in state['children'].items()}
+        self.__dict__.update(state)
     
     def get_table_of_contents(self, max_depth: int = 2) -> str:
         """Generate a table of contents view from this node."""
-        lines = []
-        self._build_toc(lines, 0, max_depth)
-        return "\n".join(lines)
-    
-    def _build_toc(self, lines: list[str], current_depth: int, max_depth: int):
-        indent = "  " * current_depth
-        lines.append(f"{indent}- {self.id}: {self.title}")
-        if current_depth < max_depth:
-            for child in self.children.values():
-                child._build_toc(lines, current_depth + 1, max_depth)
+        buf = io.StringIO()
+        stack = [(self, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if buf.tell():
+                buf.write("\n")
+            # f-string, as titles from JSON are not guaranteed to be str
+            buf.write(f"{'  ' * depth}- {node.id}: {node.title}")
+            if depth < max_depth:
+                stack.extend((child, depth + 1) for child in reversed(node.children.values()))
+        return buf.getvalue()
     
     def get_content_preview(self, max_chars: int = 500) -> str:
         """Get a preview of the section content."""
-        if len(self.content) <= max_chars:
-            return self.content
-        return self.content[:max_chars] + "..."
+        # Up to PREVIEW_CHARS the resident preview holds every character needed
+        text = self._preview if max_chars <= self.PREVIEW_CHARS else self.content
+        if self._content_length <= max_chars:
+            return text
+        return text[:max_chars] + "..."
+    
+    def formatted_sections(self, preview_chars: int = 150,
+                           children: Optional[list['DocumentNode']] = None) -> str:
+        """
+        Format child sections for LLM display.
+        
+        The full listing is memoized per preview width; passing ``children``
+        formats just that subset and is not cached.
+        """
+        if children is None:
+            cached = self._sections_cache.get(preview_chars)
+            if cached is not None:
+                return cached
+        
+        if not self.children:
+            formatted = "(No subsections - this is a leaf section)"
+        else:
+            lines = []
+            for child in (self.children.values() if children is None else children):
+                # Served from the resident preview, so listing children never reads the content file
+                preview = child.get_content_preview(200)
+                has_children = "[+]" if child.children else "[-]"
+                lines.append(f"{has_children} [{child.id}] {child.title}")
+                if preview:
+                    lines.append(f"   Preview: {preview[:preview_chars]}...")
+            formatted = "\n".join(lines)
+        
+        if children is None:
+            self._sections_cache[preview_chars] = formatted
+        return formatted
+
+
+@dataclass
+class CompactTree:
+    """
+    Struct-of-arrays view of a document tree for fast read-only walks.
+    
+    Node ``i`` is described by ``ids[i]``, ``titles[i]``, ``level[i]``,
+    ``parent[i]`` (-1 for the root) and ``children[i]`` (child indices in
+    document order). Index 0 is always the root. Content stays on the
+    DocumentNode, reachable as ``tree[i]``.
+    """
+    ids: list[str] = field(default_factory=list)
+    titles: list[str] = field(default_factory=list)
+    parent: array.array = field(default_factory=lambda: array.array('i'))
+    children: list[list[int]] = field(default_factory=list)
+    level: array.array = field(default_factory=lambda: array.array('B'))
+    nodes: list[DocumentNode] = field(default_factory=list, repr=False)
+    index_of: dict[str, int] = field(default_factory=dict, repr=False)
+    
+    @classmethod
+    def from_root(cls, root: DocumentNode) -> 'CompactTree':
+        """Flatten a DocumentNode tree in document (pre-)order."""
+        tree = cls()
+        stack = [(root, -1)]
+        while stack:
+            node, parent_index = stack.pop()
+            i = len(tree.ids)
+            tree.ids.append(node.id)
+            tree.titles.append(node.title)
+            tree.parent.append(parent_index)
+            tree.children.append([])
+            tree.level.append(node.level)
+            tree.nodes.append(node)
+            tree.index_of[node.id] = i
+            if parent_index >= 0:
+                tree.children[parent_index].append(i)
+            stack.extend((child, i) for child in reversed(list(node.children.values())))
+        return tree
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __getitem__(self, i: int) -> DocumentNode:
+        return self.nodes[i]
+
+
+@dataclass
+class SimpleTitleMatcher:
+    """
+    BM25 (Okapi) scorer over section titles and IDs.
+    
+    Per-term BM25 weights are precomputed into postings lists at build time,
+    so a query only touches the nodes that share a term with it. Scores are
+    normalized by the query's total IDF weight, so about 1.0 means every
+    query term appears in the title (short titles score a little above 1.0;
+    scores are left unclipped so they still rank); unseen query terms count
+    as the rarest term.
+    Used to answer queries that name a section outright without running
+    the LLM navigator.
+    """
+    postings: dict[str, list[tuple[int, float]]]
+    idf: dict[str, float]
+    max_idf: float = 0.0
+    k1: float = 1.5
+    b: float = 0.75
+    
+    @classmethod
+    def from_compact(cls, compact: CompactTree, k1: float = 1.5, b: float = 0.75) -> 'SimpleTitleMatcher':
+        """Index every non-root node of a compact tree."""
+        documents = [(i, _tokenize(f"{compact.titles[i]} {compact.ids[i]}")) for i in range(1, len(compact))]
+        
+        doc_freq: dict[str, int] = {}
+        for _, tokens in documents:
+            for token in set(tokens):
+                doc_freq[token] = doc_freq.get(token, 0) + 1
+        
+        n = len(documents)
+        idf = {token: math.log((n - df + 0.5) / (df + 0.5) + 1.0) for token, df in doc_freq.items()}
+        avg_length = sum(len(tokens) for _, tokens in documents) / n if n else 0.0
+        
+        postings: dict[str, list[tuple[int, float]]] = {}
+        for node_index, tokens in documents:
+            length_norm = k1 * (1 - b + b * len(tokens) / avg_length)
+            for token in dict.fromkeys(tokens):
+                tf = tokens.count(token)
+                weight = idf[token] * tf * (k1 + 1) / (tf + length_norm)
+                postings.setdefault(token, []).append((node_index, weight))
+        
+        return cls(postings=postings, idf=idf, max_idf=max(idf.values(), default=0.0), k1=k1, b=b)
+    
+    def top_k(self, query: str, k: int = 3) -> list[tuple[int, float]]:
+        """Return up to ``k`` (compact node index, normalized score) pairs, best first."""
+        query_tokens = list(dict.fromkeys(_tokenize(query)))
+        if not query_tokens or not self.postings:
+            return []
+        
+        query_weight = sum(self.idf.get(token, self.max_idf) for token in query_tokens)
+        scores: dict[int, float] = {}
+        for token in query_tokens:
+            for node_index, weight in self.postings.get(token, ()):
+                scores[node_index] = scores.get(node_index, 0.0) + weight
+        
+        # Ties go to the earlier node in document order
+        best = heapq.nlargest(k, scores.items(), key=lambda pair: (pair[1], -pair[0]))
+        return [(node_index, score / query_weight) for node_index, score in best]
 
 
 @dataclass
@@ -78,6 +525,14 @@ class DocumentIndex:
     metadata: dict
     root: DocumentNode
     nodes_by_id: dict[str, DocumentNode] = field(default_factory=dict)
+    compact: Optional[CompactTree] = field(default=None, repr=False)
+    title_matcher: Optional[SimpleTitleMatcher] = field(default=None, repr=False)
+    content_store: Optional[ContentStore] = field(default=None, repr=False)
+    
+    def __setstate__(self, state: dict):
+        # Re-intern lookup keys, matching DocumentNode.__setstate__
+        state['nodes_by_id'] = {_intern(key): node for key, node in state['nodes_by_id'].items()}
+        self.__dict__.update(state)
     
     @classmethod
     def from_sec_filing(cls, data: dict) -> 'DocumentIndex':
@@ -118,9 +573,10 @@ class DocumentIndex:
             index.nodes_by_id['Footnotes'] = footnotes_node
             
             for note_id, note_data in data['footnotes'].items():
+                note_id = _intern(note_id)
                 note_node = DocumentNode(
                     id=note_id,
-                    title=note_data['title'],
+                    title=_intern(note_data['title']),
                     content=note_data['content'],
                     level=2,
                     parent=footnotes_node
@@ -128,6 +584,8 @@ class DocumentIndex:
                 footnotes_node.children[note_id] = note_node
                 index.nodes_by_id[note_id] = note_node
         
+        index.compact = CompactTree.from_root(root)
+        index.title_matcher = SimpleTitleMatcher.from_compact(index.compact)
         return index
 
     @classmethod
@@ -173,9 +631,10 @@ class DocumentIndex:
             index.nodes_by_id['Appendices'] = appendices_node
             
             for app_id, app_data in data['appendices'].items():
+                app_id = _intern(app_id)
                 app_node = DocumentNode(
                     id=app_id,
-                    title=app_data['title'],
+                    title=_intern(app_data['title']),
                     content=app_data['content'],
                     level=2,
                     parent=appendices_node
@@ -183,24 +642,185 @@ class DocumentIndex:
                 appendices_node.children[app_id] = app_node
                 index.nodes_by_id[app_id] = app_node
         
+        index.compact = CompactTree.from_root(root)
+        index.title_matcher = SimpleTitleMatcher.from_compact(index.compact)
         return index
     
+    def offload_content(self, path: Path) -> ContentStore:
+        """
+        Move all section content into a file at ``path`` and load it lazily.
+        
+        Each node keeps its first ``PREVIEW_CHARS`` characters resident, so
+        navigation prompts and listings only touch the file when full section
+        text is needed; only sections longer than that free any memory.
+        """
+        nodes = self.compact.nodes if self.compact else list(self.nodes_by_id.values())
+        ranges = []
+        offset = 0
+        with open(path, "wb") as f:
+            for node in nodes:
+                data = node.content.encode("utf-8")
+                f.write(data)
+                ranges.append((offset, len(data)))
+                offset += len(data)
+        
+        store = ContentStore(path)
+        if offset == 0:
+            # Nothing to map (mmap rejects empty files); keep content inline
+            return store
+        
+        for node, (start, length) in zip(nodes, ranges):
+            if length:
+                node._content_ref = (store, start, length)
+                node._content = None
+        self.content_store = store
+        return store
+    
     def _add_section(self, parent: DocumentNode, section_id: str, 
                      section_data: dict, level: int):
-        """Recursively add sections to the tree."""
-        node = DocumentNode(
-            id=section_id,
-            title=section_data.get('title', section_id),
-            content=section_data.get('content', ''),
-            level=level,
-            parent=parent
-        )
-        parent.children[section_id] = node
-        self.nodes_by_id[section_id] = node
-        
-        # Process subsections
-        for sub_id, sub_data in section_data.get('subsections', {}).items():
-            self._add_section(node, sub_id, sub_data, level + 1)
+        """Add a section and all of its subsections to the tree."""
+        # Explicit stack instead of recursion; subsections are pushed in
+        # reverse so nodes are still visited in document (pre-)order
+        stack = [(parent, section_id, section_data, level)]
+        while stack:
+            parent, section_id, section_data, level = stack.pop()
+            # IDs are dict keys probed on every navigation step; LLM-supplied
+            # IDs are interned on parse too, so hits match by identity
+            section_id = _intern(section_id)
+            node = DocumentNode(
+                id=section_id,
+                title=_intern(section_data.get('title', section_id)),
+                content=section_data.get('content', ''),
+                level=level,
+                parent=parent
+            )
+            parent.children[section_id] = node
+            self.nodes_by_id[section_id] = node
+            
+            subsections = section_data.get('subsections', {})
+            for sub_id, sub_data in reversed(list(subsections.items())):
+                stack.append((node, sub_id, sub_data, level + 1))
+
+
+DEFAULT_NAV_CACHE_PATH = Path.home() / ".cache" / "pageindex" / "nav.db"
+
+NO_ANSWER_MESSAGE = "Unable to find relevant information in the document."
+
+
+@dataclass
+class _NavigationState:
+    """Mutable state of a single query's walk through the document tree."""
+    current_node: DocumentNode
+    navigation_path: list[str] = field(default_factory=lambda: ["root"])
+    reasoning_trace: list[str] = field(default_factory=list)
+    # (extracted info, confidence of the step that produced it, source section)
+    extracted_pieces: list[tuple[str, float, str]] = field(default_factory=list)
+    sources: list[str] = field(default_factory=list)
+    confidence: float = 0.0
+    # Navigation cache keys already asked during this walk; never replayed
+    used_cache_keys: set[str] = field(default_factory=set)
+
+
+class NavigationCache:
+    """
+    Exact-match cache of raw LLM navigation responses keyed by prompt hash.
+    
+    Lookups go to an in-memory LRU first and then to an optional SQLite file,
+    so identical navigation states are answered without an API call both
+    within a query (e.g. after a BACKTRACK) and across process runs.
+    ``aget()``/``aput()`` do the SQLite work in a worker thread so the
+    event loop never waits on disk.
+    """
+    
+    def __init__(self, path: Optional[Path] = DEFAULT_NAV_CACHE_PATH,
+                 max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path is not None:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(str(path), check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS navigation "
+                    "(key TEXT PRIMARY KEY, response TEXT NOT NULL)"
+                )
+                self._conn.commit()
+            except (OSError, sqlite3.Error):
+                # An unwritable cache directory should not break navigation
+                self._conn = None
+    
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Hash prompt parts (model, system prompt, user prompt) into a key."""
+        payload = orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(payload).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached raw response for a key, or None."""
+        response = self._recall(key)
+        if response is None and self._conn is not None:
+            response = self._load(key)
+        return response
+    
+    async def aget(self, key: str) -> Optional[str]:
+        """Async variant of get(); memory hits return without leaving the event loop."""
+        response = self._recall(key)
+        if response is None and self._conn is not None:
+            response = await asyncio.to_thread(self._load, key)
+        return response
+    
+    def put(self, key: str, response: str):
+        """Store a raw response in memory and, if configured, on disk."""
+        self._remember(key, response)
+        if self._conn is not None:
+            self._save(key, response)
+    
+    async def aput(self, key: str, response: str):
+        """Async variant of put()."""
+        self._remember(key, response)
+        if self._conn is not None:
+            await asyncio.to_thread(self._save, key, response)
+    
+    def _recall(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        return None
+    
+    def _load(self, key: str) -> Optional[str]:
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT response FROM navigation WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+        if row is not None:
+            self._remember(key, row[0])
+            return row[0]
+        return None
+    
+    def _save(self, key: str, response: str):
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO navigation (key, response) VALUES (?, ?)",
+                    (key, response)
+                )
+                self._conn.commit()
+            except sqlite3.Error:
+                pass
+    
+    def _remember(self, key: str, response: str):
+        with self._lock:
+            self._memory[key] = response
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
 
 
 class PageIndexNavigator:
@@ -230,7 +850,18 @@ IMPORTANT:
 - For cross-references (e.g., "see Section 2.3"), navigate to extract that section too
 - Confidence should reflect how well the extracted info answers the query"""
 
-    NAVIGATION_PROMPT = """Current Location: {current_location}
+    # Document-specific guidance goes in the user prompt so the system prompt
+    # stays byte-identical across requests for OpenAI's prompt prefix cache
+    OPERATIONS_GUIDANCE = """This is a BUSINESS/OPERATIONS document. Pay special attention to:
+- Specific procedure steps and their order
+- Policy requirements and approval thresholds
+- Markdown tiers and timing rules
+- Numerical limits, percentages, and specifications
+- Cross-references to other sections or procedures
+
+"""
+
+    NAVIGATION_PROMPT = """{document_guidance}Current Location: {current_location}
 Query: {query}
 
 Available Sections:
@@ -251,12 +882,85 @@ Decide your next action. Return JSON with:
 - extracted_info: information extracted (if action is extract)
 - confidence: 0.0-1.0 how confident you are this helps answer the query"""
 
-    def __init__(self, client: OpenAI, model: str = "gpt-4o"):
+    PLANNER_PROMPT = """Query: {query}
+
+Table of Contents:
+{table_of_contents}
+
+Plan which sections to read before navigating. Return JSON with:
+- targets: list of every section ID whose content is needed to answer the query, most specific sections first (empty list if the table of contents is not enough to decide)
+- reasoning: why these sections are needed"""
+
+    EXTRACTION_PROMPT = """{document_guidance}Query: {query}
+
+Section: {section}
+
+Section Content:
+{content}
+
+Extract the information in this section that helps answer the query. Return JSON with:
+- extracted_info: the relevant information with exact numbers, procedures, and requirements (empty string if none)
+- confidence: 0.0-1.0 how confident you are this helps answer the query"""
+
+    # Synthesis uses at most this many extracted pieces, ranked by confidence
+    MAX_SYNTHESIS_PIECES = 5
+    # Fraction of shared tokens above which two pieces count as duplicates
+    DUPLICATE_OVERLAP = 0.9
+    # Wider nodes only list this many children, picked by keyword overlap
+    MAX_AVAILABLE_SECTIONS = 10
+    # Planned extractions run concurrently, each reading at most this much text
+    MAX_PARALLEL_EXTRACTIONS = 8
+    MAX_EXTRACTION_CHARS = 4000
+    # Synthesis keeps MAX_SYNTHESIS_PIECES, so a plan only needs a little headroom
+    MAX_PLANNED_TARGETS = 6
+    # A title match is lexical, not an LLM relevance check, so it never reports
+    # more than moderate confidence however high the match score
+    FAST_PATH_CONFIDENCE = 0.5
+    # The best title match must lead the others by this much, unless the
+    # near-ties are all sections under it
+    FAST_PATH_MARGIN = 0.2
+    FAST_PATH_CANDIDATES = 5
+
+    def __init__(self, client: OpenAI,
+                 navigator_model: str = "gpt-4o-mini",
+                 synthesis_model: str = "gpt-4o",
+                 cache: Optional[SemanticCache] = None,
+                 embedding_model: Optional[str] = None,
+                 enable_cache: bool = True,
+                 nav_cache_path: Optional[Path] = DEFAULT_NAV_CACHE_PATH,
+                 async_client: Optional[AsyncOpenAI] = None,
+                 speculative_descent: bool = False,
+                 fast_path_threshold: Optional[float] = 0.7):
         self.client = client
-        self.model = model
+        self.async_client = async_client
+        self.speculative_descent = speculative_descent
+        self.fast_path_threshold = fast_path_threshold
+        self.navigator_model = navigator_model
+        self.synthesis_model = synthesis_model
+        self.cache: Optional[SemanticCache] = None
+        self.nav_cache: Optional[NavigationCache] = None
+        if enable_cache:
+            self.cache = cache if cache is not None else SemanticCache()
+            if embedding_model and self.cache.embed is None:
+                self.cache.embed = self._make_embedder(embedding_model)
+            self.nav_cache = NavigationCache(nav_cache_path)
+    
+    @property
+    def cache_stats(self) -> dict[str, int]:
+        """Hit/miss counters of the query result cache."""
+        if self.cache is None:
+            return {"hits": 0, "misses": 0}
+        return dict(self.cache.stats)
+    
+    def _make_embedder(self, embedding_model: str) -> Callable[[str], list[float]]:
+        def embed(text: str) -> list[float]:
+            response = self.client.embeddings.create(model=embedding_model, input=text)
+            return response.data[0].embedding
+        return embed
     
     def query(self, index: DocumentIndex, query: str, 
-              max_steps: int = 15) -> QueryResult:
+              max_steps: int = 15,
+              on_token: Optional[Callable[[str], None]] = None) -> QueryResult:
         """
         Navigate the document index to answer a query.
         
@@ -265,128 +969,588 @@ Decide your next action. Return JSON with:
         2. Let the LLM decide which section to explore based on reasoning
         3. Traverse the tree, extracting relevant information
         4. Synthesize a final answer from extracted pieces
+        
+        Queries whose wording clearly names one section (title match score
+        at or above ``fast_path_threshold``) skip navigation and go straight
+        to synthesis from that section; such answers report a fixed, moderate
+        confidence and a source marked as a title match.
+        
+        With ``speculative_descent`` enabled, a single planner call first picks
+        every target section from the table of contents and they are
+        extracted in parallel; the step-by-step walk is only used as a
+        fallback when the plan yields nothing.
+        
+        Results are cached per document, so repeated (or, with an embedding
+        model configured, paraphrased) queries skip navigation entirely.
+        
+        If ``on_token`` is given, the final answer is streamed and each chunk
+        is passed to it as it arrives.
         """
-        current_node = index.root
-        navigation_path = ["root"]
-        reasoning_trace = []
-        extracted_pieces = []
-        sources = []
+        if self.cache is not None:
+            cached = self.cache.get(index.document_id, query)
+            if cached is not None:
+                if on_token:
+                    on_token(cached.answer)
+                return cached
         
-        for step in range(max_steps):
-            # Build context for the LLM
-            available_sections = self._format_available_sections(current_node)
-            
-            # Get navigation decision from LLM
-            decision = self._get_navigation_decision(
-                query=query,
-                current_node=current_node,
-                available_sections=available_sections,
-                extracted_so_far=extracted_pieces,
-                nav_path=navigation_path,
-                doc_type=index.metadata.get('document_type', 'Document')
-            )
-            
-            reasoning_trace.append(f"Step {step + 1}: {decision.action.value} - {decision.reasoning}")
-            
-            if decision.action == NavigationAction.DESCEND:
-                if decision.target_section and decision.target_section in current_node.children:
-                    current_node = current_node.children[decision.target_section]
-                    navigation_path.append(decision.target_section)
-                else:
-                    reasoning_trace.append(f"  -> Invalid section '{decision.target_section}', staying at current location")
-            
-            elif decision.action == NavigationAction.EXTRACT:
-                if decision.extracted_info:
-                    extracted_pieces.append(decision.extracted_info)
-                    sources.append(f"{current_node.id}: {current_node.title}")
-            
-            elif decision.action == NavigationAction.BACKTRACK:
-                if current_node.parent:
-                    current_node = current_node.parent
-                    navigation_path.append(f"[up]{current_node.id}")
-            
-            elif decision.action == NavigationAction.COMPLETE:
-                break
+        doc_type = index.metadata.get('document_type', 'Document')
+        document_guidance, synthesis_system = self._build_doc_type_prompts(doc_type)
+        
+        state = self._title_fast_path(index, query)
+        if state is None and self.speculative_descent:
+            state = self._planned_descent(index, query, document_guidance)
+        if state is None:
+            state = self._walk_tree(index, query, max_steps, document_guidance)
         
         # Synthesize final answer
         final_answer = self._synthesize_answer(
             query, 
-            extracted_pieces, 
-            sources,
-            index.metadata.get('document_type', 'Document')
+            state.extracted_pieces, 
+            doc_type,
+            synthesis_system,
+            on_token=on_token
+        )
+        return self._finish_query(index, query, state, final_answer)
+    
+    async def aquery(self, index: DocumentIndex, query: str, max_steps: int = 15,
+                     limiter: Optional[asyncio.Semaphore] = None) -> QueryResult:
+        """
+        Async variant of query() using the AsyncOpenAI client.
+        
+        Every API call is made inside ``limiter`` when given, so many queries
+        can be gathered concurrently without exceeding a concurrency budget.
+        """
+        if self.async_client is None:
+            raise ValueError("aquery() requires the navigator to be created with an async_client")
+        
+        if self.cache is not None:
+            cached = await self.cache.aget(index.document_id, query)
+            if cached is not None:
+                return cached
+        
+        doc_type = index.metadata.get('document_type', 'Document')
+        document_guidance, synthesis_system = self._build_doc_type_prompts(doc_type)
+        
+        state = self._title_fast_path(index, query)
+        if state is None and self.speculative_descent:
+            state = await self._aplanned_descent(index, query, document_guidance, limiter)
+        if state is None:
+            state = await self._awalk_tree(index, query, max_steps, document_guidance, limiter)
+        
+        final_answer = await self._asynthesize_answer(
+            query,
+            state.extracted_pieces,
+            doc_type,
+            synthesis_system,
+            limiter=limiter
+        )
+        return await self._afinish_query(index, query, state, final_answer)
+    
+    async def aquery_many(self, index: DocumentIndex, queries: list[str],
+                          max_concurrency: int = 10) -> list[QueryResult]:
+        """Run several queries concurrently, returning results in input order."""
+        limiter = asyncio.Semaphore(max_concurrency)
+        return await asyncio.gather(*[
+            self.aquery(index, query, limiter=limiter) for query in queries
+        ])
+    
+    def _build_doc_type_prompts(self, doc_type: str) -> tuple[str, str]:
+        """Return the navigation guidance and synthesis system prompt for a document type."""
+        is_ops = any(marker in doc_type for marker in ("SOP", "Procedure", "Planning", "Supply"))
+        is_sec = "SEC" in doc_type or "Filing" in doc_type
+        
+        document_guidance = self.OPERATIONS_GUIDANCE if is_ops else ""
+        
+        synthesis_system = "You are a business documentation specialist providing precise answers."
+        if is_ops:
+            synthesis_system += " For business procedures, ensure all steps, thresholds, and policy requirements are clearly stated. Do not omit critical details."
+        elif is_sec:
+            synthesis_system = "You are a financial analyst providing precise answers based on SEC filings."
+        
+        return document_guidance, synthesis_system
+    
+    def _title_fast_path(self, index: DocumentIndex, query: str) -> Optional['_NavigationState']:
+        """Jump straight to a section whose title matches the query, without LLM calls."""
+        if self.fast_path_threshold is None or index.title_matcher is None:
+            return None
+        
+        matches = index.title_matcher.top_k(query, k=self.FAST_PATH_CANDIDATES)
+        if not matches or matches[0][1] < self.fast_path_threshold:
+            return None
+        
+        best_score = matches[0][1]
+        contenders = [(i, score) for i, score in matches if best_score - score < self.FAST_PATH_MARGIN]
+        if len(contenders) == self.FAST_PATH_CANDIDATES:
+            # Possibly more near-ties beyond the ones fetched
+            return None
+        
+        # Near-ties resolve to a section that contains all the others
+        node_index, score = min(contenders, key=lambda pair: index.compact.level[pair[0]])
+        if score < self.fast_path_threshold or not all(
+                self._is_ancestor(index.compact, node_index, i) for i, _ in contenders if i != node_index):
+            return None
+        node = index.compact[node_index]
+        state = _NavigationState(current_node=node)
+        
+        path = []
+        while node_index > 0:
+            path.append(index.compact.ids[node_index])
+            node_index = index.compact.parent[node_index]
+        state.navigation_path.extend(reversed(path))
+        
+        state.reasoning_trace.append(
+            f"Fast path: query matches section title '{node.id}: {node.title}' "
+            f"(match score {score:.2f}); navigation skipped, relevance not checked by the LLM"
         )
+        source = f"{node.id}: {node.title} (title match)"
+        state.extracted_pieces.append((self._section_text(index, node), self.FAST_PATH_CONFIDENCE, source))
+        state.sources.append(source)
+        state.confidence = self.FAST_PATH_CONFIDENCE
+        return state
+    
+    @staticmethod
+    def _is_ancestor(compact: CompactTree, ancestor: int, node: int) -> bool:
+        """Whether compact index ``ancestor`` lies on the path from the root to ``node``."""
+        while node > 0:
+            node = compact.parent[node]
+            if node == ancestor:
+                return True
+        return False
+    
+    def _walk_tree(self, index: DocumentIndex, query: str, max_steps: int,
+                   document_guidance: str) -> '_NavigationState':
+        """Navigate from the root, asking the LLM for one decision per step."""
+        state = _NavigationState(current_node=index.root)
+        query_tokens = frozenset(_tokenize(query))
+        for step in range(max_steps):
+            # Get navigation decision from LLM
+            try:
+                decision = self._get_navigation_decision(
+                    query=query,
+                    current_node=state.current_node,
+                    available_sections=self._format_available_sections(state.current_node, query_tokens),
+                    extracted_so_far=state.extracted_pieces,
+                    nav_path=state.navigation_path,
+                    document_guidance=document_guidance,
+                    used_cache_keys=state.used_cache_keys
+                )
+            except ValidationError:
+                decision = self._unparseable_decision(state)
+            if self._apply_decision(state, decision, step):
+                break
+        return state
+    
+    async def _awalk_tree(self, index: DocumentIndex, query: str, max_steps: int,
+                          document_guidance: str,
+                          limiter: Optional[asyncio.Semaphore] = None) -> '_NavigationState':
+        """Async variant of _walk_tree()."""
+        state = _NavigationState(current_node=index.root)
+        query_tokens = frozenset(_tokenize(query))
+        for step in range(max_steps):
+            try:
+                decision = await self._aget_navigation_decision(
+                    query=query,
+                    current_node=state.current_node,
+                    available_sections=self._format_available_sections(state.current_node, query_tokens),
+                    extracted_so_far=state.extracted_pieces,
+                    nav_path=state.navigation_path,
+                    document_guidance=document_guidance,
+                    limiter=limiter,
+                    used_cache_keys=state.used_cache_keys
+                )
+            except ValidationError:
+                decision = self._unparseable_decision(state)
+            if self._apply_decision(state, decision, step):
+                break
+        return state
+    
+    def _planned_descent(self, index: DocumentIndex, query: str,
+                         document_guidance: str) -> Optional['_NavigationState']:
+        """
+        Plan all target sections up front and extract from them in parallel.
+        
+        Returns None when the planner finds no usable sections or nothing
+        could be extracted from them, so the caller can fall back to the
+        step-by-step tree walk.
+        """
+        try:
+            targets = self._plan_targets(index, query)
+        except ValueError:
+            # Malformed plan (bad JSON or wrong shape) - walk the tree instead
+            return None
+        nodes = self._resolve_targets(index, targets)
+        if not nodes:
+            return None
+        
+        with ThreadPoolExecutor(max_workers=min(len(nodes), self.MAX_PARALLEL_EXTRACTIONS)) as pool:
+            extractions = list(pool.map(
+                lambda node: self._extract_from_node(index, node, query, document_guidance),
+                nodes
+            ))
+        return self._planned_state(index, nodes, extractions)
+    
+    async def _aplanned_descent(self, index: DocumentIndex, query: str, document_guidance: str,
+                                limiter: Optional[asyncio.Semaphore] = None
+                                ) -> Optional['_NavigationState']:
+        """Async variant of _planned_descent()."""
+        try:
+            targets = await self._aplan_targets(index, query, limiter)
+        except ValueError:
+            return None
+        nodes = self._resolve_targets(index, targets)
+        if not nodes:
+            return None
         
+        extractions = await asyncio.gather(*[
+            self._aextract_from_node(index, node, query, document_guidance, limiter)
+            for node in nodes
+        ])
+        return self._planned_state(index, nodes, extractions)
+    
+    def _planned_state(self, index: DocumentIndex, nodes: list[DocumentNode],
+                       extractions: list[tuple[str, float]]) -> Optional['_NavigationState']:
+        """Record planned extractions as if the sections had been navigated to."""
+        state = _NavigationState(current_node=index.root)
+        state.reasoning_trace.append(f"Plan: extract from {', '.join(node.id for node in nodes)}")
+        
+        for node, (info, confidence) in zip(nodes, extractions):
+            # Labelled like "[up]" backtracks: these sections were not walked to in a chain
+            state.navigation_path.append(f"[plan]{node.id}")
+            state.reasoning_trace.append(f"  -> extract {node.id} (confidence {confidence:.2f})")
+            if info:
+                source = f"{node.id}: {node.title}"
+                state.extracted_pieces.append((info, confidence, source))
+                state.sources.append(source)
+                state.confidence = max(state.confidence, confidence)
+        
+        return state if state.extracted_pieces else None
+    
+    def _build_plan_request(self, index: DocumentIndex, query: str) -> tuple[str, dict]:
+        """Build the cache key and chat completion arguments for the target planner."""
+        prompt = self.PLANNER_PROMPT.format(
+            query=query,
+            table_of_contents=index.root.get_table_of_contents(max_depth=3)
+        )
+        return self._json_request(self.navigator_model, prompt)
+    
+    def _plan_targets(self, index: DocumentIndex, query: str) -> list[str]:
+        """Ask the LLM for every section ID needed to answer the query."""
+        cache_key, request = self._build_plan_request(index, query)
+        return self._complete_json(cache_key, request, self._parse_plan)
+    
+    async def _aplan_targets(self, index: DocumentIndex, query: str,
+                             limiter: Optional[asyncio.Semaphore] = None) -> list[str]:
+        """Async variant of _plan_targets()."""
+        cache_key, request = self._build_plan_request(index, query)
+        return await self._acomplete_json(cache_key, request, self._parse_plan, limiter)
+    
+    @staticmethod
+    def _parse_plan(content: str) -> list[str]:
+        """Parse a raw JSON planner response; raises ValueError unless targets is a list of strings."""
+        return _TARGET_PLAN_ADAPTER.validate_json(content).targets
+    
+    @classmethod
+    def _resolve_targets(cls, index: DocumentIndex, targets: list[str]) -> list[DocumentNode]:
+        """Map planned section IDs to nodes, dropping unknown IDs and duplicates, up to the cap."""
+        nodes = [index.nodes_by_id[target] for target in dict.fromkeys(targets)
+                 if target != "root" and target in index.nodes_by_id]
+        # The planner lists the most specific sections first, so keep the head
+        return nodes[:cls.MAX_PLANNED_TARGETS]
+    
+    def _section_text(self, index: DocumentIndex, node: DocumentNode) -> str:
+        """Collect a section's content plus its subsections' (breadth-first), within budget."""
+        compact = index.compact
+        start = compact.index_of.get(node.id) if compact else None
+        if start is None or compact[start] is not node:
+            return node.content[:self.MAX_EXTRACTION_CHARS]
+        
+        parts = []
+        remaining = self.MAX_EXTRACTION_CHARS
+        queue = deque([start])
+        while queue and remaining > 0:
+            i = queue.popleft()
+            text = f"[{compact.ids[i]}] {compact.titles[i]}\n{compact[i].content}"[:remaining]
+            parts.append(text)
+            remaining -= len(text)
+            queue.extend(compact.children[i])
+        return "\n\n".join(parts)
+    
+    def _build_extraction_request(self, index: DocumentIndex, node: DocumentNode, query: str,
+                                  document_guidance: str) -> tuple[str, dict]:
+        """Build the cache key and chat completion arguments for a section extraction."""
+        prompt = self.EXTRACTION_PROMPT.format(
+            document_guidance=document_guidance,
+            query=query,
+            section=f"{node.id}: {node.title}",
+            content=self._section_text(index, node) or "(No direct content)"
+        )
+        return self._json_request(self.navigator_model, prompt)
+    
+    def _extract_from_node(self, index: DocumentIndex, node: DocumentNode, query: str,
+                           document_guidance: str) -> tuple[str, float]:
+        """Extract query-relevant information from a single section."""
+        cache_key, request = self._build_extraction_request(index, node, query, document_guidance)
+        try:
+            return self._complete_json(cache_key, request, self._parse_extraction)
+        except ValueError:
+            # One malformed extraction shouldn't sink the other planned sections
+            return "", 0.0
+    
+    async def _aextract_from_node(self, index: DocumentIndex, node: DocumentNode, query: str,
+                                  document_guidance: str,
+                                  limiter: Optional[asyncio.Semaphore] = None) -> tuple[str, float]:
+        """Async variant of _extract_from_node()."""
+        cache_key, request = self._build_extraction_request(index, node, query, document_guidance)
+        try:
+            return await self._acomplete_json(cache_key, request, self._parse_extraction, limiter)
+        except ValueError:
+            return "", 0.0
+    
+    @staticmethod
+    def _parse_extraction(content: str) -> tuple[str, float]:
+        """Parse a raw JSON extraction response into (info, confidence)."""
+        result = _SECTION_EXTRACTION_ADAPTER.validate_json(content)
+        return result.extracted_info, result.confidence
+    
+    @staticmethod
+    def _unparseable_decision(state: '_NavigationState') -> NavigationDecision:
+        """Stand-in for a response that failed validation: finish with what was gathered."""
+        return NavigationDecision(
+            action=NavigationAction.COMPLETE,
+            reasoning="Unparseable navigation response; finishing with the information gathered so far",
+            confidence=state.confidence
+        )
+    
+    @staticmethod
+    def _decision_applies(node: DocumentNode, decision: NavigationDecision) -> bool:
+        """Whether a decision would change the navigation state at ``node``."""
+        if decision.action == NavigationAction.DESCEND:
+            return bool(decision.target_section) and decision.target_section in node.children
+        if decision.action == NavigationAction.EXTRACT:
+            return bool(decision.extracted_info)
+        if decision.action == NavigationAction.BACKTRACK:
+            return node.parent is not None
+        return True
+    
+    def _apply_decision(self, state: '_NavigationState', decision: NavigationDecision,
+                        step: int) -> bool:
+        """Apply a navigation decision to the state. Returns True when navigation is done."""
+        current_node = state.current_node
+        state.confidence = decision.confidence
+        state.reasoning_trace.append(f"Step {step + 1}: {decision.action.value} - {decision.reasoning}")
+        
+        if decision.action == NavigationAction.DESCEND:
+            if decision.target_section and decision.target_section in current_node.children:
+                state.current_node = current_node.children[decision.target_section]
+                state.navigation_path.append(decision.target_section)
+            else:
+                state.reasoning_trace.append(f"  -> Invalid section '{decision.target_section}', staying at current location")
+        
+        elif decision.action == NavigationAction.EXTRACT:
+            if decision.extracted_info:
+                source = f"{current_node.id}: {current_node.title}"
+                state.extracted_pieces.append((decision.extracted_info, decision.confidence, source))
+                state.sources.append(source)
+        
+        elif decision.action == NavigationAction.BACKTRACK:
+            if current_node.parent:
+                state.current_node = current_node.parent
+                state.navigation_path.append(f"[up]{state.current_node.id}")
+        
+        elif decision.action == NavigationAction.COMPLETE:
+            return True
+        
+        return False
+    
+    def _finish_query(self, index: DocumentIndex, query: str, state: '_NavigationState',
+                      final_answer: str) -> QueryResult:
+        """Build the QueryResult for a completed navigation and cache it."""
+        result = self._build_result(state, final_answer)
+        if self.cache is not None:
+            self.cache.put(index.document_id, query, result)
+        return result
+    
+    async def _afinish_query(self, index: DocumentIndex, query: str, state: '_NavigationState',
+                             final_answer: str) -> QueryResult:
+        """Async variant of _finish_query()."""
+        result = self._build_result(state, final_answer)
+        if self.cache is not None:
+            await self.cache.aput(index.document_id, query, result)
+        return result
+    
+    @staticmethod
+    def _build_result(state: '_NavigationState', final_answer: str) -> QueryResult:
         return QueryResult(
             answer=final_answer,
-            sources=sources,
-            confidence=decision.confidence if extracted_pieces else 0.0,
-            navigation_path=navigation_path,
-            reasoning_trace=reasoning_trace
+            sources=state.sources,
+            confidence=state.confidence if state.extracted_pieces else 0.0,
+            navigation_path=state.navigation_path,
+            reasoning_trace=state.reasoning_trace
         )
     
-    def _format_available_sections(self, node: DocumentNode) -> str:
-        """Format child sections for LLM display."""
-        if not node.children:
-            return "(No subsections - this is a leaf section)"
+    def _format_available_sections(self, node: DocumentNode,
+                                   query_tokens: frozenset[str] = frozenset()) -> str:
+        """Format child sections for LLM display, trimming wide nodes to the most relevant."""
+        if len(node.children) <= self.MAX_AVAILABLE_SECTIONS:
+            return node.formatted_sections()
         
-        lines = []
-        for child_id, child in node.children.items():
-            preview = child.get_content_preview(200)
-            has_children = "[+]" if child.children else "[-]"
-            lines.append(f"{has_children} [{child_id}] {child.title}")
-            if preview:
-                lines.append(f"   Preview: {preview[:150]}...")
-        return "\n".join(lines)
+        # Rank by title/ID keyword overlap with the query; ties keep document order
+        children = list(node.children.values())
+        ranked = sorted(range(len(children)),
+                        key=lambda i: len(query_tokens & children[i].title_tokens),
+                        reverse=True)
+        selected = [children[i] for i in sorted(ranked[:self.MAX_AVAILABLE_SECTIONS])]
+        hidden = len(children) - len(selected)
+        return (f"{node.formatted_sections(children=selected)}\n"
+                f"... {hidden} more sections not shown (less relevant to the query)")
     
-    def _get_navigation_decision(self, query: str, current_node: DocumentNode,
-                                  available_sections: str, extracted_so_far: list[str],
-                                  nav_path: list[str], doc_type: str = "Document") -> NavigationDecision:
-        """Ask the LLM to decide the next navigation action."""
+    def _build_navigation_request(self, query: str, current_node: DocumentNode,
+                                  available_sections: str,
+                                  extracted_so_far: list[tuple[str, float, str]],
+                                  nav_path: list[str], document_guidance: str = "") -> tuple[str, dict]:
+        """Build the cache key and chat completion arguments for a navigation step."""
         prompt = self.NAVIGATION_PROMPT.format(
+            document_guidance=document_guidance,
             current_location=f"{current_node.id}: {current_node.title}",
             query=query,
             available_sections=available_sections,
             current_content=current_node.get_content_preview(800) or "(No direct content)",
-            extracted_info="\n".join(extracted_so_far) if extracted_so_far else "(None yet)",
+            extracted_info="\n".join(info for info, _, _ in extracted_so_far) if extracted_so_far else "(None yet)",
             nav_path=" -> ".join(nav_path)
         )
         
-        system_prompt = self.NAVIGATOR_SYSTEM_PROMPT
-        if "SOP" in doc_type or "Procedure" in doc_type or "Planning" in doc_type or "Supply" in doc_type:
-            system_prompt += "\n\nThis is a BUSINESS/OPERATIONS document. Pay special attention to:\n- Specific procedure steps and their order\n- Policy requirements and approval thresholds\n- Markdown tiers and timing rules\n- Numerical limits, percentages, and specifications\n- Cross-references to other sections or procedures"
-        
-        response = self.client.chat.completions.create(
-            model=self.model,
+        return self._json_request(self.navigator_model, prompt)
+    
+    def _json_request(self, model: str, prompt: str) -> tuple[str, dict]:
+        """Build the cache key and arguments for a JSON-mode call under the navigator system prompt."""
+        cache_key = NavigationCache.make_key(model, self.NAVIGATOR_SYSTEM_PROMPT, prompt)
+        request = dict(
+            model=model,
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": self.NAVIGATOR_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             response_format={"type": "json_object"},
             temperature=0.1
         )
+        return cache_key, request
+    
+    def _complete_json(self, cache_key: str, request: dict, parse: Callable[[str], T],
+                       replay: bool = True,
+                       accept: Optional[Callable[[T], bool]] = None) -> T:
+        """
+        Run a JSON-mode completion through the navigation cache and parse the response.
         
-        result = json.loads(response.choices[0].message.content)
-        return NavigationDecision(
-            action=NavigationAction(result.get('action', 'complete')),
-            target_section=result.get('target_section'),
-            reasoning=result.get('reasoning', ''),
-            extracted_info=result.get('extracted_info'),
-            confidence=float(result.get('confidence', 0.5))
-        )
+        ``replay=False`` skips the cache lookup and always asks the model; the
+        response is only stored if it parsed and ``accept`` (when given) approves it.
+        """
+        content = self.nav_cache.get(cache_key) if self.nav_cache and replay else None
+        if content is not None:
+            return parse(content)
+        
+        response = self.client.chat.completions.create(**request)
+        content = response.choices[0].message.content
+        parsed = parse(content)
+        # Only responses that parsed cleanly (and were usable) are worth replaying
+        if self.nav_cache and (accept is None or accept(parsed)):
+            self.nav_cache.put(cache_key, content)
+        return parsed
     
-    def _synthesize_answer(self, query: str, extracted_pieces: list[str],
-                           sources: list[str], doc_type: str = "Document") -> str:
-        """Synthesize a final answer from extracted information."""
-        if not extracted_pieces:
-            return "Unable to find relevant information in the document."
+    async def _acomplete_json(self, cache_key: str, request: dict, parse: Callable[[str], T],
+                              limiter: Optional[asyncio.Semaphore] = None,
+                              replay: bool = True,
+                              accept: Optional[Callable[[T], bool]] = None) -> T:
+        """Async variant of _complete_json()."""
+        content = await self.nav_cache.aget(cache_key) if self.nav_cache and replay else None
+        if content is not None:
+            return parse(content)
         
+        async with limiter or contextlib.nullcontext():
+            response = await self.async_client.chat.completions.create(**request)
+        content = response.choices[0].message.content
+        parsed = parse(content)
+        if self.nav_cache and (accept is None or accept(parsed)):
+            await self.nav_cache.aput(cache_key, content)
+        return parsed
+    
+    def _get_navigation_decision(self, query: str, current_node: DocumentNode,
+                                  available_sections: str,
+                                  extracted_so_far: list[tuple[str, float, str]],
+                                  nav_path: list[str], document_guidance: str = "",
+                                  used_cache_keys: Optional[set[str]] = None) -> NavigationDecision:
+        """
+        Ask the LLM to decide the next navigation action.
+        
+        A prompt whose key is already in ``used_cache_keys`` was asked earlier
+        in this walk and its answer changed nothing, so the model is asked
+        afresh instead of replaying it.
+        """
+        cache_key, request = self._build_navigation_request(
+            query, current_node, available_sections, extracted_so_far, nav_path, document_guidance
+        )
+        replay = used_cache_keys is None or cache_key not in used_cache_keys
+        if used_cache_keys is not None:
+            used_cache_keys.add(cache_key)
+        return self._complete_json(
+            cache_key, request, self._parse_navigation_decision, replay=replay,
+            accept=lambda decision: self._decision_applies(current_node, decision)
+        )
+    
+    async def _aget_navigation_decision(self, query: str, current_node: DocumentNode,
+                                        available_sections: str,
+                                        extracted_so_far: list[tuple[str, float, str]],
+                                        nav_path: list[str], document_guidance: str = "",
+                                        limiter: Optional[asyncio.Semaphore] = None,
+                                        used_cache_keys: Optional[set[str]] = None) -> NavigationDecision:
+        """Async variant of _get_navigation_decision()."""
+        cache_key, request = self._build_navigation_request(
+            query, current_node, available_sections, extracted_so_far, nav_path, document_guidance
+        )
+        replay = used_cache_keys is None or cache_key not in used_cache_keys
+        if used_cache_keys is not None:
+            used_cache_keys.add(cache_key)
+        return await self._acomplete_json(
+            cache_key, request, self._parse_navigation_decision, limiter, replay=replay,
+            accept=lambda decision: self._decision_applies(current_node, decision)
+        )
+    
+    @staticmethod
+    def _parse_navigation_decision(content: str) -> NavigationDecision:
+        """Parse a raw JSON navigation response."""
+        return _NAV_DECISION_ADAPTER.validate_json(content)
+    
+    @classmethod
+    def _select_synthesis_pieces(cls, extracted_pieces: list[tuple[str, float, str]]
+                                 ) -> list[tuple[str, float, str]]:
+        """Keep the most confident, mutually distinct pieces for synthesis."""
+        selected = []
+        selected_tokens = []
+        for piece in sorted(extracted_pieces, key=lambda p: p[1], reverse=True):
+            tokens = set(piece[0].lower().split())
+            # Token-set overlap: a piece mostly contained in a kept one is a duplicate
+            if any(len(tokens & kept) >= cls.DUPLICATE_OVERLAP * min(len(tokens), len(kept))
+                   for kept in selected_tokens if tokens and kept):
+                continue
+            selected.append(piece)
+            selected_tokens.append(tokens)
+            if len(selected) == cls.MAX_SYNTHESIS_PIECES:
+                break
+        return selected
+    
+    def _build_synthesis_request(self, query: str,
+                                 extracted_pieces: list[tuple[str, float, str]],
+                                 doc_type: str = "Document",
+                                 system_content: str = "") -> dict:
+        """Build the chat completion arguments for answer synthesis."""
+        pieces = self._select_synthesis_pieces(extracted_pieces)
+        sources = list(dict.fromkeys(source for _, _, source in pieces))
         synthesis_prompt = f"""Based on the following extracted information from a {doc_type}, 
 provide a precise, well-structured answer to the query.
 
 Query: {query}
 
 Extracted Information:
-{chr(10).join(f'- {piece}' for piece in extracted_pieces)}
+{chr(10).join(f'- {info}' for info, _, _ in pieces)}
 
 Sources: {', '.join(sources)}
 
@@ -394,19 +1558,46 @@ Provide a clear, factual answer using only the extracted information.
 Include specific numbers, percentages, procedures, and requirements where available.
 For business-critical information, ensure completeness and accuracy."""
 
-        system_content = "You are a business documentation specialist providing precise answers."
-        if "SOP" in doc_type or "Procedure" in doc_type or "Planning" in doc_type or "Supply" in doc_type:
-            system_content += " For business procedures, ensure all steps, thresholds, and policy requirements are clearly stated. Do not omit critical details."
-        elif "SEC" in doc_type or "Filing" in doc_type:
-            system_content = "You are a financial analyst providing precise answers based on SEC filings."
-        
-        response = self.client.chat.completions.create(
-            model=self.model,
+        return dict(
+            model=self.synthesis_model,
             messages=[
                 {"role": "system", "content": system_content},
                 {"role": "user", "content": synthesis_prompt}
             ],
             temperature=0.1
         )
+    
+    def _synthesize_answer(self, query: str, extracted_pieces: list[tuple[str, float, str]],
+                           doc_type: str = "Document", system_content: str = "",
+                           on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Synthesize a final answer from extracted information."""
+        if not extracted_pieces:
+            if on_token:
+                on_token(NO_ANSWER_MESSAGE)
+            return NO_ANSWER_MESSAGE
+        
+        request = self._build_synthesis_request(query, extracted_pieces, doc_type, system_content)
+        if on_token is None:
+            response = self.client.chat.completions.create(**request)
+            return response.choices[0].message.content
+        
+        chunks = []
+        for chunk in self.client.chat.completions.create(**request, stream=True):
+            if chunk.choices and chunk.choices[0].delta.content:
+                chunks.append(chunk.choices[0].delta.content)
+                on_token(chunk.choices[0].delta.content)
+        return "".join(chunks)
+    
+    async def _asynthesize_answer(self, query: str,
+                                  extracted_pieces: list[tuple[str, float, str]],
+                                  doc_type: str = "Document", system_content: str = "",
+                                  limiter: Optional[asyncio.Semaphore] = None) -> str:
+        """Async variant of _synthesize_answer()."""
+        if not extracted_pieces:
+            return NO_ANSWER_MESSAGE
+        
+        request = self._build_synthesis_request(query, extracted_pieces, doc_type, system_content)
+        async with limiter or contextlib.nullcontext():
+            response = await self.async_client.chat.completions.create(**request)
         
         return response.choices[0].message.content